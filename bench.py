@@ -0,0 +1,128 @@
+import argparse
+import json
+import random
+import sys
+import time
+
+import evaluator
+import game
+import poker
+import strength
+from card import DECK
+from deck import Deck
+
+PLAYERS = [2, 3, 5, 7]
+SEED = 2024
+
+
+def get_category_hands(seed=SEED):
+    # one seeded 7-card hand of every category, the rare royal flush is built by hand
+    rng = random.Random(seed)
+    hands = {}
+    while len(hands) < len(evaluator.HAND_RATING) - 1:
+        cards = rng.sample(DECK, 7)
+        category = strength.get_category(evaluator.get_strength(cards))
+        if category != 'Royal Flush':
+            hands.setdefault(category, cards)
+    hands['Royal Flush'] = DECK[:5] + [DECK[5], DECK[10]]
+    return {category: hands[category] for category in evaluator.HAND_RATING}
+
+
+def get_showdowns(players, amount=100, seed=SEED):
+    rng = random.Random(seed + players)
+    showdowns = []
+    for _ in range(amount):
+        deck = rng.sample(DECK, 5 + 2 * players)
+        showdowns.append(([deck[5 + 2 * player:7 + 2 * player] for player in range(players)], deck[:5]))
+    return showdowns
+
+
+def measure(function, operations, repeat=5, minimum_time=0.2):
+    """
+    Nanoseconds per operation of function, which runs operations operations per call.
+
+    The call count is raised until one run takes minimum_time, the best of repeat runs is kept.
+    """
+    calls = 1
+    while True:
+        started = time.perf_counter_ns()
+        for _ in range(calls):
+            function()
+        elapsed = time.perf_counter_ns() - started
+        if elapsed >= minimum_time * 1e9:
+            break
+        calls *= 2
+    best = elapsed
+    for _ in range(repeat - 1):
+        started = time.perf_counter_ns()
+        for _ in range(calls):
+            function()
+        best = min(best, time.perf_counter_ns() - started)
+    return best / (calls * operations)
+
+
+def get_benchmarks():
+    benchmarks = {}
+    for category, cards in get_category_hands().items():
+        benchmarks[f'get_best/{category}'] = (lambda cards=cards: evaluator.get_best(list(cards)), 1)
+        for backend in evaluator.BACKENDS:
+            benchmarks[f'strength/{backend}/{category}'] = (
+                lambda cards=cards, backend=backend: evaluator.get_strength(cards, backend), 1)
+    for players in PLAYERS:
+        showdowns = get_showdowns(players)
+        benchmarks[f'select_winner/{players}'] = (
+            lambda showdowns=showdowns: [evaluator.select_winner(hands, board) for hands, board in showdowns],
+            len(showdowns))
+        for backend in evaluator.SHOWDOWNS:
+            benchmarks[f'showdown/{backend}/{players}'] = (
+                lambda showdowns=showdowns, backend=backend: [evaluator.get_strengths(hands, board, backend)
+                                                              for hands, board in showdowns], len(showdowns))
+    benchmarks['Deck'] = (Deck, 1)
+    for players in PLAYERS:
+        benchmarks[f'play_round/{players}'] = (lambda players=players: game.play_round(players), 1)
+    for players in PLAYERS:
+        shard = (poker.initialize_postflop_table, poker.get_postflop_keys, players, SEED, 0, 1000, False)
+        benchmarks[f'postflop_round/{players}'] = (lambda shard=shard: poker.play_shard(shard), 1000)
+    return benchmarks
+
+
+def run(names=None):
+    random.seed(SEED)
+    strength.get_mask_table()
+    results = {}
+    for name, (function, operations) in get_benchmarks().items():
+        if names and not any(name.startswith(prefix) for prefix in names):
+            continue
+        results[name] = measure(function, operations)
+        print(f'{name:40} {results[name]:12.0f} ns/op {1e9 / results[name]:14.0f} ops/s')
+    return results
+
+
+def compare(results, baseline, threshold):
+    # benchmarks that got slower than the baseline by more than threshold, as name: ratio
+    return {name: value / baseline[name] for name, value in results.items()
+            if name in baseline and value > baseline[name] * (1 + threshold)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark evaluation and simulation hot paths.')
+    parser.add_argument('names', nargs='*', help='only run benchmarks starting with these names')
+    parser.add_argument('--save', metavar='JSON', help='write the results as a baseline')
+    parser.add_argument('--baseline', metavar='JSON', help='compare the results against a saved baseline')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed slowdown, 0.25 is 25%%')
+    arguments = parser.parse_args()
+    results = run(arguments.names)
+    if arguments.save:
+        with open(arguments.save, 'w') as f:
+            json.dump(results, f, indent=2)
+    if arguments.baseline:
+        with open(arguments.baseline) as f:
+            regressions = compare(results, json.load(f), arguments.threshold)
+        for name, ratio in regressions.items():
+            print(f'{name} regressed: {ratio:.2f}x the baseline time')
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
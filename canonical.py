@@ -0,0 +1,49 @@
+import itertools
+
+from card import CARD_RANKS, CARD_SUITS, DECK
+
+SUIT_MASK = (1 << len(CARD_RANKS)) - 1
+
+
+def get_suit_blocks(mask):
+    # the ranks of every suit as a 5-bit block of the card mask
+    return [(mask >> (suit * len(CARD_RANKS))) & SUIT_MASK for suit in range(len(CARD_SUITS))]
+
+
+def canonicalize(*masks):
+    """
+    Masks of groups of cards, e.g. hole cards and board, with the suits renamed into a canonical order.
+
+    Two situations that only differ by a permutation of the suits get the same masks, because the suits
+    are ordered by what every group holds of them.
+
+    >>> canonicalize(0b11, 0b11100) == canonicalize(0b11 << 15, 0b11100 << 15)
+    True
+    >>> canonicalize(0b11, 0b1 << 5) == canonicalize(0b11, 0b1)
+    False
+    """
+    blocks = sorted(zip(*[get_suit_blocks(mask) for mask in masks]), reverse=True)
+    return tuple(sum(block[group] << (suit * len(CARD_RANKS)) for suit, block in enumerate(blocks))
+                 for group in range(len(masks)))
+
+
+def get_canonical_states(*sizes):
+    """
+    Every distinct situation of disjoint card groups of the given sizes up to suit permutations,
+    with the number of plain card combinations that fall into it.
+
+    >>> states = get_canonical_states(2)
+    >>> len(states), sum(states.values())
+    (25, 190)
+    """
+    states = {(): 1}
+    for size in sizes:
+        extended = {}
+        for state, weight in states.items():
+            used = sum(state)
+            cards = [card.mask for card in DECK if not used & card.mask]
+            for combination in itertools.combinations(cards, size):
+                key = canonicalize(*state, sum(combination))
+                extended[key] = extended.get(key, 0) + weight
+        states = extended
+    return states
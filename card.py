@@ -1,10 +1,56 @@
+CARD_RANKS = ['A', 'K', 'Q', 'J', 'T']
+CARD_SUITS = ['C', 'H', 'S', 'D']
+
+
 class Card:
-    def __init__(self, rank, suit):
-        self.rank = rank
-        self.suit = suit
+    """
+    Every card exists exactly once, asking for the same rank and suit again returns the same object.
+
+    >>> Card('A', 'C') is Card('A', 'C')
+    True
+    >>> Card('T', 'D').index, Card('T', 'D').mask
+    (19, 524288)
+    """
+    __slots__ = ('rank', 'suit', 'rank_index', 'suit_index', 'index', 'mask')
+    _cards = {}
+
+    def __new__(cls, rank, suit):
+        card = cls._cards.get((rank, suit))
+        if card is None:
+            card = super().__new__(cls)
+            card.rank = rank
+            card.suit = suit
+            card.rank_index = CARD_RANKS.index(rank)
+            card.suit_index = CARD_SUITS.index(suit)
+            card.index = card.suit_index * len(CARD_RANKS) + card.rank_index
+            card.mask = 1 << card.index
+            cls._cards[rank, suit] = card
+        return card
+
+    def __reduce__(self):
+        return Card, (self.rank, self.suit)
 
     def __str__(self):
         return self.rank + self.suit
 
     def __repr__(self):
-        return self.rank + self.suit
\ No newline at end of file
+        return self.rank + self.suit
+
+
+# all cards ordered by their index
+DECK = [Card(rank, suit) for suit in CARD_SUITS for rank in CARD_RANKS]
+
+
+def get_mask(cards):
+    mask = 0
+    for card in cards:
+        mask |= card.mask
+    return mask
+
+
+def get_cards(mask):
+    """
+    >>> get_cards(Card('K', 'H').mask | Card('A', 'C').mask)
+    [AC, KH]
+    """
+    return [card for card in DECK if mask & card.mask]
@@ -1,23 +1,62 @@
 import random
 
-from card import Card
+from card import CARD_RANKS, CARD_SUITS, DECK
 
-CARD_RANKS = ['A', 'K', 'Q', 'J', 'T']
-CARD_SUITS = ['C', 'H', 'S', 'D']
+# random numbers drawn at once whenever a dealer runs out
+DRAWS = 4096
+
+
+class Dealer:
+    """
+    Deals from one preallocated deck, only the cards a round needs get shuffled.
+
+    Without a seed or a generator the cards come from the random module, so random.seed still applies.
+    cards restricts the deck, e.g. to the cards left after some were dealt on purpose.
+
+    >>> Dealer(seed=1).deal(7) == Dealer(seed=1).deal(7)
+    True
+    >>> len(set(Dealer(rng=random.Random(2)).deal(20)))
+    20
+    """
+
+    def __init__(self, seed=None, rng=None, cards=DECK):
+        if rng is None:
+            rng = random.Random(seed) if seed is not None else random
+        self.rng = rng
+        self.cards = list(cards)
+        self.draws = []
+
+    def set_cards(self, cards):
+        # deal from other cards but keep the drawn random numbers
+        self.cards = list(cards)
+
+    def deal(self, amount):
+        # a partial Fisher-Yates shuffle, the deck is left as it is because any order is a fine start
+        cards = self.cards
+        draws = self.draws
+        if len(draws) < amount:
+            draws.extend([self.rng.random() for _ in range(DRAWS)])
+        size = len(cards)
+        for position in range(amount):
+            other = position + int(draws.pop() * (size - position))
+            cards[position], cards[other] = cards[other], cards[position]
+        return cards[:amount]
+
+
+dealer = Dealer()
 
 
 class Deck:
-    def __init__(self):
+    def __init__(self, dealer=dealer):
+        self.dealer = dealer
         self.deck = self.init_deck()
 
     def init_deck(self):
-        deck = [(Card(rank, suit)) for suit in CARD_SUITS for rank in CARD_RANKS]
-        shuffled_deck = list(deck)
-        random.shuffle(shuffled_deck)
-        return shuffled_deck
+        # the cards are shared singletons, only the order is new
+        return self.dealer.deal(len(DECK))
 
     def get_card(self):
         return self.deck.pop()
 
     def deal_cards(self, num):
-        return [self.get_card() for _ in range(num)]
+        return [self.get_card() for _ in range(num)]
\ No newline at end of file
@@ -0,0 +1,112 @@
+import argparse
+import functools
+import itertools
+import time
+
+import canonical
+from card import CARD_RANKS, CARD_SUITS, Card, DECK, get_cards, get_mask
+from evaluator import get_strength
+from poker import count_opponent_deals, count_outcomes, get_card_types, get_type_strengths
+
+CACHE_SIZE = 100_000
+
+
+def parse_cards(cards):
+    """
+    Cards given as objects or as strings like 'AH' or 'ah'.
+
+    >>> parse_cards(['ah', Card('K', 'H')])
+    [AH, KH]
+    """
+    parsed = []
+    for card in cards:
+        if not isinstance(card, Card):
+            card = card.strip().upper()
+            if len(card) != 2 or card[0] not in CARD_RANKS or card[1] not in CARD_SUITS:
+                raise ValueError(f'{card} is not a card of the {len(DECK)}-card deck')
+            card = Card(card[0], card[1])
+        parsed.append(card)
+    return parsed
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def get_canonical_equity(hole, board, known, opponents):
+    # hole, board and the known hands are canonical masks, so isomorphic questions share one entry
+    used = hole | board | sum(known)
+    runouts = {}
+    for cards in itertools.combinations([card for card in DECK if not used & card.mask], 5 - bin(board).count('1')):
+        # runouts that are suit-isomorphic together with the hands play out the same way
+        key = canonical.canonicalize(hole | board | get_mask(cards), hole, *known)
+        runouts[key] = runouts.get(key, 0) + 1
+    won_amount = even_amount = played_amount = 0
+    for (shown, hero, *hands), weight in runouts.items():
+        full_board = get_cards(shown & ~hero)
+        cards = [card for card in DECK if not (shown | sum(hands)) & card.mask]
+        known_hands = [get_cards(hand) for hand in hands]
+        hero_strength = get_strength(get_cards(hero) + full_board)
+        known_strength = max((get_strength(hand + full_board) for hand in known_hands), default=-1)
+        types, representatives = get_card_types(cards, full_board)
+        counts = [len(representatives[card_type]) for card_type in types]
+        won, even = count_outcomes(counts, get_type_strengths(types, representatives, full_board), hero_strength,
+                                   opponents)
+        if known_strength > hero_strength:
+            won = even = 0
+        elif known_strength == hero_strength:
+            won, even = 0, won + even
+        won_amount += weight * won
+        even_amount += weight * even
+        played_amount += weight * count_opponent_deals((len(cards),), ((True,),), opponents)
+    return won_amount / played_amount, even_amount / played_amount, 1 - (won_amount + even_amount) / played_amount
+
+
+def get_equity(hole, board=(), opponents=1, known=()):
+    """
+    Exact win, tie and loss probabilities of the hole cards against opponents random hands and the known hands,
+    over every runout of the board.
+
+    >>> [round(value, 4) for value in get_equity(['AH', 'KH'], ['QH', 'JH', 'TH'])]
+    [1.0, 0.0, 0.0]
+    >>> get_equity(['AC', 'KC'], opponents=2) == get_equity(['AD', 'KD'], opponents=2)
+    True
+    >>> get_equity(['AH', 'AD'], ['AC', 'KC', 'KD', 'QH', 'QS'], opponents=0, known=[['KH', 'KS']])
+    (0.0, 0.0, 1.0)
+    >>> get_equity(['AH', 'KH'], opponents=-1)
+    Traceback (most recent call last):
+    ...
+    ValueError: the number of opponents cannot be negative
+    """
+    hole, board, known = parse_cards(hole), parse_cards(board), [parse_cards(hand) for hand in known]
+    cards = hole + board + [card for hand in known for card in hand]
+    if len(hole) != 2 or any(len(hand) != 2 for hand in known):
+        raise ValueError('every hand needs two cards')
+    if len(board) > 5:
+        raise ValueError('the board has at most five cards')
+    if opponents < 0:
+        raise ValueError('the number of opponents cannot be negative')
+    if len(set(cards)) != len(cards):
+        raise ValueError('a card is dealt twice')
+    if len(cards) + 5 - len(board) + 2 * opponents > len(DECK):
+        raise ValueError(f'not enough cards for {opponents} more opponents')
+    masks = canonical.canonicalize(get_mask(hole), get_mask(board), *sorted(get_mask(hand) for hand in known))
+    return get_canonical_equity(masks[0], masks[1], tuple(sorted(masks[2:])), opponents)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Exact equity of hole cards against random and known hands.')
+    parser.add_argument('hole', nargs=2, help='hole cards like AH KH')
+    parser.add_argument('--board', nargs='*', default=[], help='zero to five board cards')
+    parser.add_argument('--opponents', type=int, default=1, help='opponents with random hands')
+    parser.add_argument('--known', nargs=2, action='append', default=[], metavar='CARD',
+                        help='the hand of an opponent, can be given more than once')
+    arguments = parser.parse_args()
+    started = time.perf_counter()
+    try:
+        win, tie, loss = get_equity(arguments.hole, arguments.board, arguments.opponents, arguments.known)
+    except ValueError as error:
+        parser.error(str(error))
+    print(f'Win: {win * 100:.2f}% Tie: {tie * 100:.2f}% Loss: {loss * 100:.2f}% '
+          f'({(time.perf_counter() - started) * 1000:.0f} ms)')
+
+
+if __name__ == '__main__':
+    main()
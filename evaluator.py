@@ -0,0 +1,315 @@
+import argparse
+import itertools
+import random
+import sys
+
+import strength
+from card import CARD_RANKS, Card, DECK
+
+HAND_RATING = ['Royal Flush', 'Four of a Kind', 'Full House', 'Straight', 'Two Pair']
+
+
+def get_distribution(cards):
+    ranks = {'A': 0, 'K': 0, 'Q': 0, 'J': 0, 'T': 0}
+    for card in cards:
+        ranks[card.rank] += 1
+    # sort the ranks by the amount of cards
+    return {k: v for k, v in sorted(ranks.items(), key=lambda item: item[1], reverse=True)}
+
+
+def is_royal_flush(cards):
+    """
+    >>> is_royal_flush([Card('T', 'C'), Card('J', 'C'), Card('Q', 'C'), Card('K', 'C'), Card('A', 'C'), Card('T', 'D'), Card('J', 'S')])
+    True
+    >>> is_royal_flush([Card('T', 'C'), Card('J', 'C'), Card('Q', 'C'), Card('K', 'C'), Card('A', 'D'), Card('T', 'D'), Card('J', 'S')])
+    False
+    """
+    suits = {'C': 0, 'D': 0, 'H': 0, 'S': 0}
+    for card in cards:
+        suits[card.suit] += 1
+    has_same_suit = 5 in suits.values()
+    # suit that has 5 cards
+    suit = ''
+    for key, value in suits.items():
+        if value == 5:
+            suit = key
+            break
+    if not has_same_suit:
+        return False
+    ranks = ['T', 'J', 'Q', 'K', 'A']
+    for card in cards:
+        if card.rank in ranks and card.suit == suit:
+            ranks.remove(card.rank)
+    return len(ranks) == 0
+
+
+def is_four_of_a_kind(ranks):
+    """
+    >>> is_four_of_a_kind({'T': 4, 'J': 1, 'Q': 2, 'K': 0, 'A': 0})
+    True
+    >>> is_four_of_a_kind({'T': 3, 'J': 1, 'Q': 2, 'K': 1, 'A': 0})
+    False
+    """
+    # check if the first key has 4 cards
+    return list(ranks.values())[0] == 4
+
+
+def is_full_house(ranks):
+    """
+    >>> is_full_house({'T': 3, 'Q': 2,'J': 1 , 'K': 0, 'A': 0})
+    True
+    >>> is_full_house({'T': 3, 'Q': 3,'J': 1,  'K': 0, 'A': 0})
+    True
+    >>> is_full_house({'T': 2, 'J': 1, 'Q': 2, 'K': 1, 'A': 0})
+    False
+    """
+    return list(ranks.values())[0] == 3 and list(ranks.values())[1] >= 2
+
+
+def is_straight(ranks):
+    """
+    >>> is_straight({'T': 1, 'J': 1, 'Q': 1, 'K': 1, 'A': 2})
+    True
+    >>> is_straight({'T': 1, 'J': 1, 'Q': 1, 'K': 3, 'A': 0})
+    False
+    """
+    return 0 not in ranks.values()
+
+
+def is_two_pair(ranks):
+    """
+    >>> is_two_pair({'T': 2, 'J': 2, 'Q': 2, 'K': 1, 'A': 0})
+    True
+    >>> is_two_pair({'T': 1, 'J': 1, 'Q': 2, 'K': 1, 'A': 1})
+    False
+    """
+    return list(ranks.values()).count(2) >= 2
+
+
+def sort_cards(hands):
+    # sort the cards by rank
+    return sorted(hands, key=lambda card: card.rank_index)
+
+
+def get_four_of_a_kind_card_order(cards, ranks):
+    ordered_cards = []
+    remove_cards = []
+    for card in cards:
+        if card.rank == list(ranks.keys())[0]:
+            ordered_cards.append(card)
+            remove_cards.append(card)
+    for card in remove_cards:
+        cards.remove(card)
+    ordered_cards.append(sort_cards(cards)[0])
+    return ordered_cards
+
+
+def get_full_house_card_order(cards, ranks):
+    ordered_cards = []
+    for card in cards:
+        if card.rank == list(ranks.keys())[0]:
+            ordered_cards.append(card)
+    for card in cards:
+        if card.rank == list(ranks.keys())[1]:
+            ordered_cards.append(card)
+    if len(ordered_cards) > 5:
+        ordered_cards = ordered_cards[:5]
+    return ordered_cards
+
+
+def get_two_pair_card_order(cards, ranks):
+    ordered_cards = []
+    remove_cards = []
+    for card in cards:
+        if card.rank == list(ranks.keys())[0]:
+            ordered_cards.append(card)
+            remove_cards.append(card)
+        if card.rank == list(ranks.keys())[1]:
+            ordered_cards.append(card)
+            remove_cards.append(card)
+    for card in remove_cards:
+        cards.remove(card)
+    ordered_cards.append(sort_cards(cards)[0])
+    return ordered_cards
+
+
+def get_royal_flush_card_order(cards):
+    # suit that has 5 cards
+    ordered_cards = []
+    suits = {'C': 0, 'D': 0, 'H': 0, 'S': 0}
+    for card in cards:
+        suits[card.suit] += 1
+    # suit that has 5 cards
+    suit = ''
+    for key, value in suits.items():
+        if value == 5:
+            suit = key
+            break
+    for card in cards:
+        if card.suit == suit:
+            ordered_cards.append(card)
+    return sort_cards(ordered_cards)
+
+
+def get_best(cards):
+    ranks = get_distribution(cards)
+    if is_royal_flush(cards):
+        return 'Royal Flush', get_royal_flush_card_order(cards)
+    elif is_four_of_a_kind(ranks):
+        return 'Four of a Kind', get_four_of_a_kind_card_order(cards, ranks)
+    elif is_full_house(ranks):
+        return 'Full House', get_full_house_card_order(cards, ranks)
+    elif is_straight(ranks):
+        return 'Straight', None
+    elif is_two_pair(ranks):
+        return 'Two Pair', get_two_pair_card_order(cards, ranks)
+    else:
+        # print(ranks)
+        return Exception('No best hand')
+
+
+def get_reference_strength(cards):
+    """
+    Strength of get_best in the integer encoding of the strength table.
+
+    >>> get_reference_strength([Card('K', 'S'), Card('A', 'H'), Card('K', 'H'), Card('A', 'S'), Card('J', 'S'), Card('J', 'H'), Card('T', 'D')])
+    3091
+    """
+    best, card_value = get_best(list(cards))
+    if best == 'Two Pair':
+        # the pairs come out in card order, put the higher pair first
+        card_value = sort_cards(card_value[:4]) + card_value[4:]
+    value = 0
+    for card in card_value or []:
+        value = value * len(CARD_RANKS) + len(CARD_RANKS) - 1 - card.rank_index
+    if best in ('Royal Flush', 'Straight'):
+        value = 0
+    return (len(HAND_RATING) - 1 - HAND_RATING.index(best)) * strength.CATEGORY_SIZE + value
+
+
+# the analysis of every board seen so far, keyed by its mask
+_boards = {}
+
+
+def get_board_analysis(community_cards, board_mask):
+    # the rank count key of the board and the cards every suit with three cards on the board still misses
+    # for a royal flush
+    board_key = sum(strength.CARD_WEIGHTS[card.index] for card in community_cards)
+    royal_needs = [suit & ~board_mask for suit in strength.SUIT_MASKS if bin(board_mask & suit).count('1') >= 3]
+    return board_key, royal_needs
+
+
+def get_incremental_strengths(player_hands, community_cards):
+    """
+    Strength of every hand at one showdown, the board is analyzed once and every hand only adds its two cards.
+
+    >>> get_incremental_strengths([[Card('A', 'H'), Card('K', 'H')], [Card('A', 'S'), Card('A', 'D')]], [Card('Q', 'H'), Card('J', 'H'), Card('T', 'H'), Card('A', 'C'), Card('K', 'C')])
+    [12500, 3125]
+    """
+    table = strength.get_count_table()
+    weights = strength.CARD_WEIGHTS
+    board_mask = 0
+    for card in community_cards:
+        board_mask |= card.mask
+    board = _boards.get(board_mask)
+    if board is None:
+        board = _boards[board_mask] = get_board_analysis(community_cards, board_mask)
+    board_key, royal_needs = board
+    if not royal_needs:
+        return [table[board_key + weights[first.index] + weights[second.index]] for first, second in player_hands]
+    strengths = []
+    for first, second in player_hands:
+        if any(not needed & ~(first.mask | second.mask) for needed in royal_needs):
+            strengths.append(strength.ROYAL_FLUSH)
+        else:
+            strengths.append(table[board_key + weights[first.index] + weights[second.index]])
+    return strengths
+
+
+def get_table_strengths(player_hands, community_cards):
+    # the mask of the board is built once, every hand only adds the masks of its two cards
+    mask_table = strength.get_mask_table()
+    board_mask = 0
+    for card in community_cards:
+        board_mask |= card.mask
+    return [mask_table[board_mask | first.mask | second.mask] for first, second in player_hands]
+
+
+def get_incremental_strength(cards):
+    return get_incremental_strengths([cards[:2]], cards[2:])[0]
+
+
+# every backend maps a list of cards to the strength of its best hand, a higher strength is a better hand
+BACKENDS = {'reference': get_reference_strength,
+            'table': strength.get_strength,
+            'incremental': get_incremental_strength}
+# backends that evaluate a whole showdown at once, sharing the work on the community cards
+SHOWDOWNS = {'table': get_table_strengths,
+             'incremental': get_incremental_strengths}
+selected_backend = 'table'
+
+
+def set_backend(name):
+    global selected_backend
+    if name not in BACKENDS:
+        raise ValueError(f'unknown backend {name}, choose one of {", ".join(BACKENDS)}')
+    selected_backend = name
+
+
+def get_strength(cards, backend=None):
+    return BACKENDS[backend or selected_backend](cards)
+
+
+def get_strengths(player_hands, community_cards, backend=None):
+    backend = backend or selected_backend
+    if backend in SHOWDOWNS:
+        return SHOWDOWNS[backend](player_hands, community_cards)
+    return [BACKENDS[backend](player_card + community_cards) for player_card in player_hands]
+
+
+def select_winner(player_hands, community_cards, backend=None):
+    strengths = get_strengths(player_hands, community_cards, backend)
+    best_strength = max(strengths)
+    return best_strength, [index for index, value in enumerate(strengths) if value == best_strength]
+
+
+def compare_backends(backends=None, showdowns=100_000, seed=0):
+    """
+    Run every backend over every 7-card set and over random showdowns of 2 to 7 players.
+
+    Returns the disagreements as (cards, results per backend) pairs, for a showdown the cards are the
+    player hands followed by the community cards and the results are the winner indexes.
+    """
+    backends = backends or list(BACKENDS)
+    disagreements = []
+    for cards in itertools.combinations(DECK, 7):
+        results = {backend: BACKENDS[backend](list(cards)) for backend in backends}
+        if len(set(results.values())) > 1:
+            disagreements.append((list(cards), results))
+    rng = random.Random(seed)
+    for showdown in range(showdowns):
+        players = 2 + showdown % 6
+        deck = rng.sample(DECK, 5 + 2 * players)
+        community_cards = deck[:5]
+        player_hands = [deck[5 + 2 * player:7 + 2 * player] for player in range(players)]
+        results = {backend: tuple(select_winner(player_hands, community_cards, backend)[1]) for backend in backends}
+        if len(set(results.values())) > 1:
+            disagreements.append((player_hands + [community_cards], results))
+    return disagreements
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check that all evaluator backends agree.')
+    parser.add_argument('--backends', nargs='+', choices=list(BACKENDS))
+    parser.add_argument('--showdowns', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=0)
+    arguments = parser.parse_args()
+    disagreements = compare_backends(arguments.backends, arguments.showdowns, arguments.seed)
+    for cards, results in disagreements[:20]:
+        print(cards, results)
+    print(f'{len(disagreements)} disagreements')
+    sys.exit(1 if disagreements else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+import argparse
+import functools
+import itertools
+import struct
+import time
+
+from card import DECK
+from deck import Dealer
+from evaluator import get_strength, sort_cards
+from showdown import get_places
+
+MAGIC = b'POKERHST'
+VERSION = 1
+# magic, version, players per deal and bytes per deal, all little-endian
+HEADER = struct.Struct('<8sIII')
+CHUNK = struct.Struct('<I')
+# deals per chunk, a chunk is only shorter at the end of a file
+CHUNK_ROUNDS = 65536
+CARD_BITS = 5
+RANK_BITS = 3
+
+
+def get_record_size(players):
+    # five board cards and two cards per player, then the showdown rank of every player
+    return -(-((5 + 2 * players) * CARD_BITS + players * RANK_BITS) // 8)
+
+
+class Recorder:
+    """
+    Streams deals into a history file, every card as a 5-bit index and every deal in the same number of bytes.
+
+    >>> import os, tempfile
+    >>> file = os.path.join(tempfile.mkdtemp(), 'rounds.hist')
+    >>> recorder = Recorder(file, 2)
+    >>> recorder.record(DECK[:5], [DECK[5:7], DECK[7:9]])
+    >>> recorder.close()
+    >>> list(read_rounds(file))
+    [([AC, KC, QC, JC, TC], [[AH, KH], [QH, JH]], [0, 0])]
+    """
+
+    def __init__(self, file, players):
+        self.players = players
+        self.size = get_record_size(players)
+        self.file = open(file, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, players, self.size))
+        self.records = []
+
+    def record(self, open_cards, hands, strengths=None):
+        if strengths is None:
+            strengths = [get_strength(hand + open_cards) for hand in hands]
+        value = 0
+        shift = 0
+        for card in open_cards:
+            value |= card.index << shift
+            shift += CARD_BITS
+        for first, second in hands:
+            value |= (first.index | second.index << CARD_BITS) << shift
+            shift += 2 * CARD_BITS
+        for rank in get_places(strengths):
+            value |= rank << shift
+            shift += RANK_BITS
+        self.records.append(value.to_bytes(self.size, 'little'))
+        if len(self.records) == CHUNK_ROUNDS:
+            self.flush()
+
+    def flush(self):
+        if self.records:
+            self.file.write(CHUNK.pack(len(self.records)) + b''.join(self.records))
+            self.records = []
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+def read_chunks(file):
+    # the players of the file and the bytes of its chunks, one chunk at a time
+    with open(file, 'rb') as f:
+        magic, version, players, size = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{file} is not a hand history')
+        while True:
+            head = f.read(CHUNK.size)
+            if not head:
+                break
+            yield players, size, f.read(CHUNK.unpack(head)[0] * size)
+
+
+@functools.lru_cache(maxsize=None)
+def get_card_lists(cards):
+    # every bit field of cards 5-bit card indexes decoded into its list of cards, the lists are shared
+    indexes = range(1 << CARD_BITS)
+    return [[DECK[index] if index < len(DECK) else None for index in reversed(field)]
+            for field in itertools.product(indexes, repeat=cards)]
+
+
+def read_rounds(*files):
+    """
+    Board, hands and showdown places of every recorded deal.
+
+    The hands are shared lists, a tally must not change them.
+    """
+    triples, pairs = get_card_lists(3), get_card_lists(2)
+    for file in files:
+        for players, size, chunk in read_chunks(file):
+            cards = 5 + 2 * players
+            hand_shifts = range(5 * CARD_BITS, cards * CARD_BITS, 2 * CARD_BITS)
+            rank_shifts = range(cards * CARD_BITS, cards * CARD_BITS + players * RANK_BITS, RANK_BITS)
+            for start in range(0, len(chunk), size):
+                value = int.from_bytes(chunk[start:start + size], 'little')
+                yield triples[value & 0x7fff] + pairs[value >> 15 & 0x3ff], \
+                    [pairs[value >> shift & 0x3ff] for shift in hand_shifts], [value >> shift & 7 for shift in rank_shifts]
+
+
+def tally(rounds, initialize, get_keys, players=None):
+    """
+    The played, won, even and lost counters of a simulation, built from recorded rounds.
+
+    The first player is the hero, with players only the first players of every deal take part.
+    """
+    played_amount = initialize()
+    won_amount = initialize()
+    even_amount = initialize()
+    lost_amount = initialize()
+    for open_cards, hands, ranks in rounds:
+        hero = ranks[0]
+        best_opponent = min(ranks[1:players])
+        if hero < best_opponent:
+            amount = won_amount
+        elif hero == best_opponent:
+            amount = even_amount
+        else:
+            amount = lost_amount
+        for key in get_keys(hands[0], open_cards):
+            played_amount[key] += 1
+            amount[key] += 1
+    return played_amount, won_amount, even_amount, lost_amount
+
+
+def record(rounds, players, file, seed=None):
+    # play rounds like a simulation shard and keep every deal
+    deal = Dealer(seed=seed).deal
+    needed = 5 + 2 * players
+    recorder = Recorder(file, players)
+    for _ in range(rounds):
+        cards = deal(needed)
+        open_cards = cards[:5]
+        recorder.record(open_cards, [sort_cards(cards[index:index + 2]) for index in range(5, needed, 2)])
+    recorder.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Record deals into a hand history file.')
+    parser.add_argument('file')
+    parser.add_argument('--rounds', type=int, default=1_000_000)
+    parser.add_argument('--players', type=int, default=7)
+    parser.add_argument('--seed', type=int)
+    arguments = parser.parse_args()
+    started = time.perf_counter()
+    record(arguments.rounds, arguments.players, arguments.file, arguments.seed)
+    print(f'{arguments.rounds} rounds in {time.perf_counter() - started:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+import argparse
+import functools
+import itertools
+
+import canonical
+import output
+import strength
+from card import DECK
+from evaluator import sort_cards
+from poker import get_preflop_keys, initialize_table
+
+MATRIX_FILE = '2_matrix.csv'
+
+
+def get_hand_class(hand):
+    return get_preflop_keys(sort_cards(hand), [])[0]
+
+
+def compute_matrix():
+    """
+    Heads-up played, won, even and lost counts of every pair of hand classes over every deal.
+
+    Every board is enumerated once, all hole cards left are evaluated against it in one batch
+    and every two disjoint hands are compared by their strengths.
+    """
+    classes = list(initialize_table())
+    amounts = tuple({(row, column): 0 for row in classes for column in classes} for _ in range(4))
+    played_amount, won_amount, even_amount, lost_amount = amounts
+    mask_table = strength.get_mask_table()
+    for (board,), weight in canonical.get_canonical_states(5).items():
+        cards = [card for card in DECK if not board & card.mask]
+        hands = [(first.mask | second.mask, get_hand_class([first, second]),
+                  mask_table[board | first.mask | second.mask]) for first, second in itertools.combinations(cards, 2)]
+        for index, (mask, hand_class, hand_strength) in enumerate(hands):
+            for other_mask, other_class, other_strength in hands[index + 1:]:
+                if mask & other_mask:
+                    continue
+                played_amount[hand_class, other_class] += weight
+                played_amount[other_class, hand_class] += weight
+                if hand_strength > other_strength:
+                    won_amount[hand_class, other_class] += weight
+                    lost_amount[other_class, hand_class] += weight
+                elif hand_strength < other_strength:
+                    lost_amount[hand_class, other_class] += weight
+                    won_amount[other_class, hand_class] += weight
+                else:
+                    even_amount[hand_class, other_class] += weight
+                    even_amount[other_class, hand_class] += weight
+    return amounts
+
+
+def get_equity(won, even, played):
+    # a tie wins half the pot heads-up
+    return (won + even / 2) / played if played else 0.0
+
+
+def write_matrix(file, played_amount, won_amount, even_amount, lost_amount):
+    # one row per hand class with its equity against every class, so the lookup tools read it like any table
+    classes = list(initialize_table())
+    with open(file, 'w') as f:
+        f.write(','.join(['Hand'] + classes) + '\n')
+        for row in classes:
+            cells = [get_equity(won_amount[row, column], even_amount[row, column], played_amount[row, column])
+                     for column in classes]
+            f.write(','.join([row] + [f'{cell * 100:.1f}%' for cell in cells]) + '\n')
+
+
+def read_matrix(file=MATRIX_FILE):
+    with open(file) as f:
+        columns = f.readline().rstrip('\n').split(',')[1:]
+        return {cells[0]: {column: float(cell.rstrip('%')) / 100 for column, cell in zip(columns, cells[1:])}
+                for cells in (line.rstrip('\n').split(',') for line in f)}
+
+
+@functools.lru_cache(maxsize=None)
+def get_combinations(row, column):
+    """
+    Number of ways to deal the hero a hand of one class and the villain a hand of the other without sharing a card.
+
+    >>> get_combinations('AA', 'AA'), get_combinations('AK', 'AA'), get_combinations('AK', 'QJ')
+    (6, 48, 256)
+    """
+    hands = {hand_class: [] for hand_class in initialize_table()}
+    for first, second in itertools.combinations(DECK, 2):
+        hands[get_hand_class([first, second])].append(first.mask | second.mask)
+    return sum(1 for first in hands[row] for second in hands[column] if not first & second)
+
+
+def parse_range(text):
+    """
+    >>> parse_range('AA, AK:0.5')
+    {'AA': 1.0, 'AK': 0.5}
+    """
+    hand_range = {}
+    for entry in text.split(','):
+        hand_class, _, weight = entry.strip().partition(':')
+        hand_class = output.get_canonical(hand_class)
+        if hand_class not in initialize_table():
+            raise ValueError(f'{hand_class} is not a hand class')
+        hand_range[hand_class] = float(weight or 1)
+    return hand_range
+
+
+def get_range_equity(matrix, hero_range, villain_range):
+    """
+    Equity of a weighted range against another, every pair of classes counts with its weights and the number
+    of ways both hands can be dealt together.
+    """
+    total = equity = 0.0
+    for row, row_weight in hero_range.items():
+        for column, column_weight in villain_range.items():
+            weight = row_weight * column_weight * get_combinations(row, column)
+            total += weight
+            equity += weight * matrix[row][column]
+    return equity / total if total else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Heads-up equity of hand classes and ranges.')
+    parser.add_argument('--file', default=MATRIX_FILE)
+    parser.add_argument('--compute', action='store_true', help='enumerate every deal and write the matrix first')
+    parser.add_argument('--hero', help="range like 'AA,AK:0.5'")
+    parser.add_argument('--villain', help="range like 'KK,QQ,AK'")
+    arguments = parser.parse_args()
+    if arguments.compute:
+        write_matrix(arguments.file, *compute_matrix())
+    if arguments.hero and arguments.villain:
+        try:
+            equity = get_range_equity(read_matrix(arguments.file), parse_range(arguments.hero),
+                                      parse_range(arguments.villain))
+        except ValueError as error:
+            parser.error(str(error))
+        print(f'Equity: {equity * 100:.2f}%')
+
+
+if __name__ == '__main__':
+    main()
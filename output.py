@@ -1,48 +1,129 @@
+import argparse
+import sys
+
+import results
+
+ranking = ['A', 'K', 'Q', 'J', 'T']
+# suited tables follow the ranks with s or o for the hole cards and m, t or r for the flop texture
+suits = {2: ('', 's', 'o'), 5: ('', 'sm', 'st', 'sr', 'om', 'ot', 'or'), 6: ('',), 7: ('',)}
+
+# header and rows of every table read so far, the rows are keyed by the sorted hand
+tables = {}
+
+
+def split_suits(combination):
+    # the ranks come first, the suit suffix starts at the first letter that is not a rank
+    ranks = len(combination)
+    for index, card in enumerate(combination):
+        if card.upper() not in 'AKQJT':
+            ranks = index
+            break
+    return combination[:ranks].upper(), combination[ranks:].lower()
+
+
+def is_valid(combination):
+    ranks, suffix = split_suits(combination)
+    return len(ranks) in suits and suffix in suits[len(ranks)] and ranks + suffix == combination
+
+
 def get_input():
-    combination = input('Enter your combination: \n').upper()
-    if len(combination) != 5:
-        print('Invalid input')
-        return get_input()
-    if not all([card in 'AKQJT' for card in combination]):
+    while True:
+        combination = get_canonical(input('Enter your combination: \n'))
+        if is_valid(combination):
+            return combination
         print('Invalid input')
-        return get_input()
-    return combination
 
-ranking = ['A', 'K', 'Q', 'J', 'T']
 
 def sort_combination(combination):
     return sorted(combination, key=lambda card: ranking.index(card))
 
+
+def get_canonical(combination):
+    """
+    >>> get_canonical(' tkaak')
+    'AAKKT'
+    >>> get_canonical('kaS'), get_canonical('tkaakOT')
+    ('AKs', 'AAKKTot')
+    """
+    ranks, suffix = split_suits(combination.strip())
+    combination = ranks + suffix
+    return ''.join(sort_combination(ranks)) + suffix if is_valid(combination) else combination
+
+
 def open_file(file):
+    if file.endswith('.bin'):
+        # binary tables are mapped into memory and answer get() like the dict of a csv table
+        table = results.Results(file)
+        return table.header, table
+    table = {}
     with open(file, 'r') as f:
-        lines = f.readlines()
-    return lines
+        header = f.readline().rstrip('\n').split(',')
+        for line in f:
+            information = line.rstrip('\n').split(',')
+            table[information[0]] = information
+    return header, table
+
+
+def get_table(file):
+    if file not in tables:
+        tables[file] = open_file(file)
+    return tables[file]
+
+
+def get_information(table, combination):
+    return table.get(combination) if is_valid(combination) else None
+
+
+def lookup(file, combinations):
+    """
+    Rows of many hands at once, None for hands that are not in the table.
+
+    >>> [information[0] for information in lookup('2_preflop.csv', ['ka', 'TT'])]
+    ['AK', 'TT']
+    >>> lookup('2_preflop.csv', ['AX'])
+    [None]
+    """
+    header, table = get_table(file)
+    return [get_information(table, get_canonical(combination)) for combination in combinations]
 
-def get_information(lines, combination):
-    for line in lines:
-        if line.startswith(combination):
-            return line.split(',')
-    return None
 
 def get_output(file):
     combination = get_input()
-    combination = ''.join(sort_combination(combination))
-    lines = open_file(file)
-    information = get_information(lines, combination)
+    header, table = get_table(file)
+    information = get_information(table, combination)
     if information:
         print('Information about {}'.format(combination))
-        print('Hand: {}'.format(information[0]))
-        print('Played: {}'.format(information[1]))
-        print('Won: {}'.format(information[2]))
-        print('Even: {}'.format(information[3]))
-        print('Lost: {}'.format(information[4]))
+        # the labels come from the header, so the error column and the matrix columns are named right
+        for name, value in zip(header, information):
+            print('{}: {}'.format(name, value))
     else:
         print('No information about {}'.format(combination))
 
 
-if __name__ == '__main__':
-    while True:
-        #get_output('3_postflop.csv')
-        get_output('5_postflop.csv')
-        print()
+def print_batch(file, lines, out=sys.stdout):
+    # one hand per line in, one csv row per hand out, unknown hands keep their input and empty fields
+    header, table = get_table(file)
+    out.write(','.join(header) + '\n')
+    combinations = [line.strip() for line in lines if line.strip()]
+    for combination, information in zip(combinations, lookup(file, combinations)):
+        out.write(','.join(information if information else [combination] + [''] * (len(header) - 1)) + '\n')
 
+
+def main():
+    parser = argparse.ArgumentParser(description='Look up hands in an equity table.')
+    parser.add_argument('file', nargs='?', default='5_postflop.csv')
+    parser.add_argument('--batch', metavar='HANDS', help="file with one hand per line, '-' reads stdin")
+    arguments = parser.parse_args()
+    if arguments.batch == '-':
+        print_batch(arguments.file, sys.stdin)
+    elif arguments.batch:
+        with open(arguments.batch) as f:
+            print_batch(arguments.file, f)
+    else:
+        while True:
+            get_output(arguments.file)
+            print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+import argparse
+import array
+import mmap
+import struct
+import sys
+
+MAGIC = b'POKERTBL'
+VERSION = 1
+# magic, version, number of buckets and the width of a bucket key in bytes, all little-endian
+HEADER = struct.Struct('<8sIII')
+COLUMNS = ['Played', 'Won', 'Even', 'Lost']
+
+
+def get_counts_offset(rows, width):
+    # the int64 counts start on an 8-byte boundary after the bucket index
+    size = HEADER.size + rows * width
+    return size + -size % 8
+
+
+def get_row(key, played, won, even, lost):
+    """
+    A table row in the csv layout, buckets that never came up show 0%.
+
+    >>> get_row('AK', 200, 100, 50, 50)
+    ['AK', '200', '50.0%', '25.0%', '25.0%']
+    """
+    total = played or 1
+    return [key, str(played), f'{won / total * 100:.1f}%', f'{even / total * 100:.1f}%', f'{lost / total * 100:.1f}%']
+
+
+def write_results(file, played_amount, won_amount, even_amount, lost_amount):
+    """
+    Write the raw counts of every bucket: the header, the bucket keys and one row of four int64 counts per bucket.
+    """
+    keys = list(played_amount)
+    width = max((len(key) for key in keys), default=0)
+    counts = array.array('q')
+    for key in keys:
+        counts.extend((played_amount[key], won_amount[key], even_amount[key], lost_amount[key]))
+    if sys.byteorder == 'big':
+        counts.byteswap()
+    index = b''.join(key.encode('ascii').ljust(width, b'\0') for key in keys)
+    with open(file, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(keys), width))
+        f.write(index)
+        f.write(b'\0' * (get_counts_offset(len(keys), width) - HEADER.size - len(index)))
+        counts.tofile(f)
+
+
+class Results:
+    """
+    A results table mapped into memory, the counts are read straight from the file.
+
+    >>> import os, tempfile
+    >>> file = os.path.join(tempfile.mkdtemp(), 'results.bin')
+    >>> write_results(file, {'AA': 4, 'AK': 2}, {'AA': 3, 'AK': 1}, {'AA': 0, 'AK': 1}, {'AA': 1, 'AK': 0})
+    >>> results = Results(file)
+    >>> list(results), results.get_counts('AK').tolist(), results.get('AA')
+    (['AA', 'AK'], [2, 1, 1, 0], ['AA', '4', '75.0%', '0.0%', '25.0%'])
+    >>> results.close()
+    """
+    header = ['Hand'] + COLUMNS
+
+    def __init__(self, file):
+        with open(file, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, rows, width = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION:
+            self.map.close()
+            raise ValueError(f'{file} is not a results table')
+        index = self.map[HEADER.size:HEADER.size + rows * width]
+        self.keys = [index[row * width:(row + 1) * width].rstrip(b'\0').decode('ascii') for row in range(rows)]
+        self.rows = {key: row for row, key in enumerate(self.keys)}
+        offset = get_counts_offset(rows, width)
+        self.counts = memoryview(self.map)[offset:offset + rows * len(COLUMNS) * 8].cast('q')
+        if sys.byteorder == 'big':
+            # the file is little-endian, swapped counts can't stay in the mapping
+            counts = array.array('q', self.counts)
+            counts.byteswap()
+            self.counts.release()
+            self.counts = memoryview(counts)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __iter__(self):
+        return iter(self.keys)
+
+    def __contains__(self, key):
+        return key in self.rows
+
+    def get_counts(self, key):
+        # played, won, even and lost of a bucket as a view into the file
+        row = self.rows[key] * len(COLUMNS)
+        return self.counts[row:row + len(COLUMNS)]
+
+    def get(self, key, default=None):
+        if key not in self.rows:
+            return default
+        return get_row(key, *self.get_counts(key))
+
+    def get_amounts(self):
+        # the four columns as dicts keyed by bucket, like the counters of a simulation
+        return tuple({key: self.counts[row * len(COLUMNS) + column] for row, key in enumerate(self.keys)}
+                     for column in range(len(COLUMNS)))
+
+    def close(self):
+        self.counts.release()
+        self.map.close()
+
+
+def read_results(file):
+    results = Results(file)
+    try:
+        return results.get_amounts()
+    finally:
+        results.close()
+
+
+def read_csv(file):
+    """
+    The counts of a csv table, won, even and lost are rebuilt from the rounded percentages.
+    """
+    amounts = ({}, {}, {}, {})
+    with open(file) as f:
+        f.readline()
+        for line in f:
+            key, played, won, even = line.rstrip('\n').split(',')[:4]
+            played = int(played)
+            amounts[0][key] = played
+            amounts[1][key] = round(float(won.rstrip('%')) * played / 100)
+            amounts[2][key] = round(float(even.rstrip('%')) * played / 100)
+            amounts[3][key] = played - amounts[1][key] - amounts[2][key]
+    return amounts
+
+
+def write_csv(file, played_amount, won_amount, even_amount, lost_amount):
+    with open(file, 'w') as f:
+        f.write(','.join(Results.header) + '\n')
+        for key, played in played_amount.items():
+            f.write(','.join(get_row(key, played, won_amount[key], even_amount[key], lost_amount[key])) + '\n')
+
+
+def merge_results(files, file):
+    """
+    Add up the counts of runs over the same buckets into one table.
+    """
+    merged = None
+    for amounts in map(read_results, files):
+        if merged is None:
+            merged = amounts
+            continue
+        for total, amount in zip(merged, amounts):
+            for key, value in amount.items():
+                total[key] = total.get(key, 0) + value
+    write_results(file, *merged)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert and merge binary results tables.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    to_csv = commands.add_parser('to-csv', help='write a binary table as csv')
+    to_csv.add_argument('source')
+    to_csv.add_argument('target')
+    from_csv = commands.add_parser('from-csv', help='write a csv table as binary, counts come from the percentages')
+    from_csv.add_argument('source')
+    from_csv.add_argument('target')
+    merge = commands.add_parser('merge', help='add up binary tables of several runs')
+    merge.add_argument('target')
+    merge.add_argument('sources', nargs='+')
+    arguments = parser.parse_args()
+    if arguments.command == 'to-csv':
+        write_csv(arguments.target, *read_results(arguments.source))
+    elif arguments.command == 'from-csv':
+        write_results(arguments.target, *read_csv(arguments.source))
+    else:
+        merge_results(arguments.sources, arguments.target)
+
+
+if __name__ == '__main__':
+    main()
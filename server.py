@@ -0,0 +1,209 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import output
+
+TABLE_FILES = [f'{players}_{street}.csv' for players in (2, 3, 5) for street in ('preflop', 'postflop', 'turn', 'river')]
+TABLE_FILES.append('2_matrix.csv')
+RELOAD_INTERVAL = 1.0
+
+
+class Stats:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.requests = 0
+        self.hands = 0
+        self.errors = 0
+        self.reloads = 0
+        self.reload_errors = 0
+        self.latency = 0.0
+        self.max_latency = 0.0
+
+    def add(self, latency, hands, error):
+        self.requests += 1
+        self.hands += hands
+        self.errors += error
+        self.latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+    def as_dict(self):
+        uptime = time.monotonic() - self.started
+        return {'uptime': uptime,
+                'requests': self.requests,
+                'hands': self.hands,
+                'errors': self.errors,
+                'reloads': self.reloads,
+                'reload_errors': self.reload_errors,
+                'requests_per_second': self.requests / uptime,
+                'hands_per_second': self.hands / uptime,
+                'mean_latency_ms': self.latency / self.requests * 1000 if self.requests else 0.0,
+                'max_latency_ms': self.max_latency * 1000}
+
+
+class EquityServer:
+    """
+    Keeps the equity tables in memory and answers lookups over http.
+
+    GET /lookup?table=3_postflop&hand=AAKKQ answers one hand, POST /lookup with
+    {"table": "3_postflop", "hands": [...]} answers many, GET /stats returns the counters.
+
+    >>> server = EquityServer()
+    >>> status, payload, hands = server.respond('GET', '/lookup?table=2_preflop&hand=ka', b'')
+    >>> status, payload['results'][0]['Hand'], payload['results'][0]['Won']
+    (200, 'AK', '43.0%')
+    >>> status, payload, hands = server.respond('POST', '/lookup', b'{"table": "2_preflop", "hands": ["tt", "AX"]}')
+    >>> status, [row and row['Hand'] for row in payload['results']], hands
+    (200, ['TT', None], 2)
+    >>> server.respond('POST', '/lookup', b'["AK"]')
+    Traceback (most recent call last):
+    ...
+    ValueError: the body must be a JSON object
+    """
+
+    def __init__(self, directory='.', files=TABLE_FILES):
+        self.directory = directory
+        self.files = {os.path.splitext(file)[0]: os.path.join(directory, file) for file in files}
+        self.modified = {}
+        self.stats = Stats()
+        self.reload()
+
+    def reload(self):
+        """
+        Read the tables again whose files changed, a file that cannot be read keeps its old table.
+
+        >>> import shutil, tempfile
+        >>> directory = tempfile.mkdtemp()
+        >>> file = shutil.copy('2_preflop.csv', directory)
+        >>> server = EquityServer(directory, ['2_preflop.csv'])
+        >>> with open(file, 'w') as f:
+        ...     _ = f.write('Hand,Played,Won,Even,Lost\\nAK,10,90.0%,0.0%,10.0%\\n')
+        >>> os.utime(file, ns=(0, 1))
+        >>> server.reload()
+        >>> server.stats.reloads, server.lookup('2_preflop', ['AK'])[0]['Won']
+        (1, '90.0%')
+        >>> with open(file, 'wb') as f:
+        ...     _ = f.write(b'\\xff\\xfe')
+        >>> os.utime(file, ns=(0, 2))
+        >>> server.reload()
+        >>> server.stats.reload_errors, server.lookup('2_preflop', ['AK'])[0]['Won']
+        (1, '90.0%')
+        """
+        for file in self.files.values():
+            try:
+                modified = os.stat(file).st_mtime_ns
+            except OSError:
+                continue
+            if self.modified.get(file) == modified:
+                continue
+            try:
+                table = output.open_file(file)
+            except (OSError, ValueError):
+                # a file that vanished or is broken is tried again once it changes, the old table keeps serving
+                self.stats.reload_errors += 1
+            else:
+                output.tables[file] = table
+                if file in self.modified:
+                    self.stats.reloads += 1
+            self.modified[file] = modified
+
+    async def watch(self):
+        while True:
+            await asyncio.sleep(RELOAD_INTERVAL)
+            self.reload()
+
+    def lookup(self, table, hands):
+        if table not in self.files or self.files[table] not in output.tables:
+            raise KeyError(f'unknown table {table}')
+        header, rows = output.tables[self.files[table]]
+        return [dict(zip(header, row)) if row else None for row in
+                (output.get_information(rows, output.get_canonical(hand)) for hand in hands)]
+
+    def respond(self, method, target, body):
+        url = urlsplit(target)
+        if method == 'GET' and url.path == '/stats':
+            return 200, self.stats.as_dict(), 0
+        if url.path != '/lookup':
+            return 404, {'error': f'no such path {url.path}'}, 0
+        if method == 'GET':
+            query = parse_qs(url.query)
+            table, hands = query.get('table', [''])[0], query.get('hand', [])
+        elif method == 'POST':
+            request = json.loads(body or b'{}')
+            if not isinstance(request, dict):
+                raise ValueError('the body must be a JSON object')
+            table, hands = request.get('table', ''), request.get('hands', [])
+            if not isinstance(table, str):
+                raise ValueError('table must be a string')
+            if not isinstance(hands, list) or not all(isinstance(hand, str) for hand in hands):
+                raise ValueError('hands must be a list of strings')
+        else:
+            return 405, {'error': f'method {method} not allowed'}, 0
+        return 200, {'table': table, 'results': self.lookup(table, hands)}, len(hands)
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = (await reader.readline()).decode('latin-1').strip()
+                    if not line:
+                        break
+                    name, _, value = line.partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+                started = time.perf_counter()
+                try:
+                    status, payload, hands = self.respond(method, target, body)
+                except (KeyError, ValueError) as error:
+                    status, payload, hands = 400, {'error': str(error.args[0])}, 0
+                except Exception as error:
+                    # a bug must not drop the connection without an answer or go uncounted
+                    status, payload, hands = 500, {'error': f'{type(error).__name__}: {error}'}, 0
+                self.stats.add(time.perf_counter() - started, hands, status != 200)
+
+                content = json.dumps(payload).encode()
+                writer.write(f'HTTP/1.1 {status} {"OK" if status == 200 else "Error"}\r\n'
+                             f'Content-Type: application/json\r\nContent-Length: {len(content)}\r\n\r\n'.encode()
+                             + content)
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8765, unix=None):
+        if unix:
+            server = await asyncio.start_unix_server(self.handle, unix)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        watcher = asyncio.ensure_future(self.watch())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            watcher.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve equity table lookups on localhost.')
+    parser.add_argument('--directory', default='.')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', metavar='PATH', help='listen on a unix socket instead of a tcp port')
+    arguments = parser.parse_args()
+    # only ever bind to the loopback interface
+    asyncio.run(EquityServer(arguments.directory).serve('127.0.0.1', arguments.port, arguments.unix))
+
+
+if __name__ == '__main__':
+    main()
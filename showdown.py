@@ -0,0 +1,84 @@
+from card import Card
+from evaluator import get_strengths
+
+
+def get_places(strengths):
+    """
+    Showdown place of every player, 0 is the best hand and equal hands share a place.
+
+    The places keep the order of any subset of the players, so one ranking settles every side pot.
+
+    >>> get_places([7, 9, 7, 3])
+    [1, 0, 1, 2]
+    """
+    places = {strength: place for place, strength in enumerate(sorted(set(strengths), reverse=True))}
+    return [places[strength] for strength in strengths]
+
+
+def rank_players(player_hands, community_cards, backend=None):
+    """
+    Strength and place of every player, all hands are evaluated in one pass.
+
+    >>> board = [Card('Q', 'H'), Card('J', 'H'), Card('T', 'H'), Card('A', 'C'), Card('K', 'C')]
+    >>> rank_players([[Card('A', 'H'), Card('K', 'H')], [Card('A', 'S'), Card('A', 'D')], [Card('Q', 'S'), Card('Q', 'D')]], board)
+    ([12500, 3125, 3125], [0, 1, 1])
+    """
+    strengths = get_strengths(player_hands, community_cards, backend)
+    return strengths, get_places(strengths)
+
+
+def get_pots(contributions, folded=()):
+    """
+    The main pot and the side pots as (amount, players who can win it), main pot first.
+
+    Every all-in level of the players still in the hand opens a new pot. Chips of folded players above the
+    highest level of the others go to the last pot.
+
+    >>> get_pots([100, 40, 100, 70], folded=[3])
+    [(160, [0, 1, 2]), (150, [0, 2])]
+    """
+    levels = sorted({contribution for player, contribution in enumerate(contributions)
+                     if player not in folded and contribution})
+    pots = []
+    previous = 0
+    for level in levels:
+        amount = sum(min(contribution, level) - min(contribution, previous) for contribution in contributions)
+        players = [player for player, contribution in enumerate(contributions)
+                   if player not in folded and contribution >= level]
+        pots.append((amount, players))
+        previous = level
+    excess = sum(contribution - min(contribution, previous) for contribution in contributions)
+    if excess and pots:
+        pots[-1] = (pots[-1][0] + excess, pots[-1][1])
+    return pots
+
+
+def split_pots(pots, places):
+    """
+    Chips won by every player, each pot goes to its players with the best place.
+
+    Split pots are divided evenly, odd chips go to the winners in seat order.
+
+    >>> split_pots([(160, [0, 1, 2]), (151, [0, 2])], [1, 0, 1, 2])
+    [76, 160, 75, 0]
+    """
+    payouts = [0] * len(places)
+    for amount, players in pots:
+        best = min(places[player] for player in players)
+        winners = [player for player in players if places[player] == best]
+        share, odd = divmod(amount, len(winners))
+        for order, player in enumerate(winners):
+            payouts[player] += share + (order < odd)
+    return payouts
+
+
+def settle(player_hands, community_cards, contributions, folded=(), backend=None):
+    """
+    Payouts of a showdown, from the hands, the chips every player put in and the players who folded.
+
+    >>> board = [Card('A', 'C'), Card('A', 'D'), Card('K', 'C'), Card('K', 'D'), Card('Q', 'H')]
+    >>> settle([[Card('A', 'H'), Card('A', 'S')], [Card('K', 'H'), Card('K', 'S')], [Card('Q', 'S'), Card('Q', 'D')]], board, [50, 100, 100])
+    [150, 100, 0]
+    """
+    strengths, places = rank_players(player_hands, community_cards, backend)
+    return split_pots(get_pots(contributions, folded), places)
@@ -0,0 +1,153 @@
+import array
+import itertools
+import math
+import os
+
+from card import CARD_RANKS, CARD_SUITS
+
+HAND_RATING = ['Royal Flush', 'Four of a Kind', 'Full House', 'Straight', 'Two Pair']
+
+DECK_SIZE = len(CARD_RANKS) * len(CARD_SUITS)
+HAND_SIZE = 7
+# every hand gets five tie-break digits in base 5 below its category
+CATEGORY_SIZE = len(CARD_RANKS) ** 5
+TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'strength.bin')
+
+BINOMIALS = [[math.comb(n, k) for k in range(HAND_SIZE + 1)] for n in range(DECK_SIZE)]
+ROYAL_FLUSH = (len(HAND_RATING) - 1) * CATEGORY_SIZE
+# a card adds its weight to the rank count key, the amount of every rank as a base-5 digit
+CARD_WEIGHTS = [len(CARD_RANKS) ** (index % len(CARD_RANKS)) for index in range(DECK_SIZE)]
+SUIT_MASKS = [((1 << len(CARD_RANKS)) - 1) << (suit * len(CARD_RANKS)) for suit in range(len(CARD_SUITS))]
+
+_table = None
+_mask_table = None
+_count_table = None
+
+
+def get_hand_index(indices):
+    """
+    Position of a set of card indices in the combinatorial number system.
+
+    >>> get_hand_index([0, 1, 2, 3, 4, 5, 6])
+    0
+    >>> get_hand_index([13, 14, 15, 16, 17, 18, 19])
+    77519
+    """
+    return sum(BINOMIALS[index][position + 1] for position, index in enumerate(sorted(indices)))
+
+
+def evaluate(indices):
+    """
+    Strength of the best hand in a set of card indices, a higher number is a better hand.
+
+    >>> evaluate([0, 1, 2, 3, 4, 5, 10]) // CATEGORY_SIZE
+    4
+    >>> evaluate([0, 5, 10, 15, 1, 6, 2]) // CATEGORY_SIZE
+    3
+    >>> evaluate([0, 5, 1, 6, 3, 8, 7]) == evaluate([0, 5, 1, 6, 2, 7, 3])
+    True
+    """
+    rank_count = [0] * len(CARD_RANKS)
+    suit_count = [0] * len(CARD_SUITS)
+    for index in indices:
+        suit, rank = divmod(index, len(CARD_RANKS))
+        rank_count[rank] += 1
+        suit_count[suit] += 1
+    if len(CARD_RANKS) in suit_count:
+        return ROYAL_FLUSH
+    return evaluate_ranks(rank_count)
+
+
+def evaluate_ranks(rank_count):
+    """
+    Strength of the best hand without a royal flush, which only depends on the amount of cards of every rank.
+
+    >>> evaluate_ranks([2, 2, 1, 1, 1]) // CATEGORY_SIZE
+    1
+    """
+    # highest count first, the better rank first among equal counts
+    groups = sorted(((count, len(CARD_RANKS) - 1 - rank) for rank, count in enumerate(rank_count) if count),
+                    reverse=True)
+    if groups[0][0] == 4:
+        category, digits = 3, [groups[0][1]] * 4 + [max(value for _, value in groups[1:])]
+    elif groups[0][0] == 3 and groups[1][0] >= 2:
+        category, digits = 2, [groups[0][1]] * 3 + [groups[1][1]] * 2
+    elif len(groups) == len(CARD_RANKS):
+        category, digits = 1, []
+    else:
+        category = 0
+        digits = [groups[0][1]] * 2 + [groups[1][1]] * 2 + [max(value for _, value in groups[2:])]
+    value = 0
+    for digit in digits + [0] * (5 - len(digits)):
+        value = value * len(CARD_RANKS) + digit
+    return category * CATEGORY_SIZE + value
+
+
+def build_table():
+    table = array.array('H', bytes(2 * math.comb(DECK_SIZE, HAND_SIZE)))
+    for indices in itertools.combinations(range(DECK_SIZE), HAND_SIZE):
+        table[get_hand_index(indices)] = evaluate(indices)
+    return table
+
+
+def load_table(file=TABLE_FILE):
+    table = array.array('H')
+    try:
+        with open(file, 'rb') as f:
+            table.fromfile(f, math.comb(DECK_SIZE, HAND_SIZE))
+        return table
+    except (OSError, EOFError):
+        pass
+    table = build_table()
+    try:
+        with open(file, 'wb') as f:
+            table.tofile(f)
+    except OSError:
+        # a read-only checkout still works, the table is just rebuilt next time
+        pass
+    return table
+
+
+def get_table():
+    global _table
+    if _table is None:
+        _table = load_table()
+    return _table
+
+
+def get_mask_table():
+    # the same strengths keyed by the 20-bit mask of the hand, a dict lookup beats computing the index
+    global _mask_table
+    if _mask_table is None:
+        table = get_table()
+        _mask_table = {sum(1 << index for index in indices): table[get_hand_index(indices)]
+                       for indices in itertools.combinations(range(DECK_SIZE), HAND_SIZE)}
+    return _mask_table
+
+
+def get_count_table():
+    # strengths without a royal flush keyed by the sum of the card weights of a hand
+    global _count_table
+    if _count_table is None:
+        _count_table = array.array('H', bytes(2 * len(CARD_RANKS) ** len(CARD_RANKS)))
+        for rank_count in itertools.product(range(len(CARD_SUITS) + 1), repeat=len(CARD_RANKS)):
+            if sum(rank_count) == HAND_SIZE:
+                key = sum(count * len(CARD_RANKS) ** rank for rank, count in enumerate(rank_count))
+                _count_table[key] = evaluate_ranks(rank_count)
+    return _count_table
+
+
+def get_strength(cards):
+    mask = 0
+    for card in cards:
+        mask |= card.mask
+    return get_mask_table()[mask]
+
+
+def get_category(strength):
+    """
+    >>> get_category(evaluate([0, 1, 2, 3, 4, 5, 10]))
+    'Royal Flush'
+    """
+    return HAND_RATING[len(HAND_RATING) - 1 - strength // CATEGORY_SIZE]
+
@@ -0,0 +1,48 @@
+import json
+import time
+
+PHASES = ['shuffle', 'deal', 'evaluate', 'tally']
+
+
+class Feed:
+    """
+    Structured progress records, written as JSON lines to a file or handed to a callback.
+
+    >>> records = []
+    >>> Feed(records.append).emit('progress', rounds=10)
+    >>> records[0]['event'], records[0]['rounds']
+    ('progress', 10)
+    """
+
+    def __init__(self, target):
+        self.callback = target if callable(target) else None
+        self.file = None if callable(target) else open(target, 'a')
+
+    def emit(self, event, **record):
+        record = {'event': event, 'time': time.time(), **record}
+        if self.callback:
+            self.callback(record)
+        else:
+            self.file.write(json.dumps(record) + '\n')
+            self.file.flush()
+
+    def close(self):
+        if self.file:
+            self.file.close()
+
+
+def get_progress(rounds, done, started, phases, played_amount):
+    # rates since the start of this run, the phases are nanoseconds summed over all shards
+    elapsed = time.monotonic() - started
+    rounds_per_second = done / elapsed if elapsed else 0.0
+    timed = sum(phases.values())
+    return {'rounds': done,
+            'total': rounds,
+            'elapsed': elapsed,
+            'rounds_per_second': rounds_per_second,
+            'eta': (rounds - done) / rounds_per_second if rounds_per_second else None,
+            'covered_buckets': sum(1 for value in played_amount.values() if value),
+            'buckets': len(played_amount),
+            'min_bucket_played': min(played_amount.values()),
+            'phase_seconds': {phase: value / 1e9 for phase, value in phases.items()},
+            'phase_share': {phase: value / timed if timed else 0.0 for phase, value in phases.items()}}
@@ -0,0 +1,277 @@
+import argparse
+import functools
+import multiprocessing
+import os
+import time
+
+import output
+import strength
+from card import CARD_RANKS, DECK
+from deck import Dealer
+from poker import get_interval_width, get_rank_key_value, get_shard_rng
+from showdown import settle
+
+FOLD, CALL, BET, ALL_IN = range(4)
+STACK = 100
+SMALL_BLIND = 1
+BIG_BLIND = 2
+# the blinds double every BLIND_HANDS hands, a match still running after MATCH_HANDS hands goes to the biggest stack
+BLIND_HANDS = 50
+MATCH_HANDS = 1000
+# raises per street, a bet after that only calls
+MAX_RAISES = 3
+SHARD_MATCHES = 100
+# every seat gets two cards next to the five of the board
+MAX_SEATS = (len(DECK) - 5) // 2
+
+
+@functools.lru_cache(maxsize=None)
+def get_equities(players, directory='.'):
+    """
+    Equity of every hand of the preflop and postflop tables, indexed by the rank count value of its cards.
+
+    The equity is the won rate plus half the even rate. Preflop and postflop keys have different values, so one
+    list holds both. The tables of the largest smaller player count stand in for missing ones.
+
+    >>> equities = get_equities(2)
+    >>> round(equities[get_rank_key_value('AA')], 2), round(equities[get_rank_key_value('AAAAK')], 2)
+    (0.7, 1.0)
+    >>> get_equities(4, '.') is get_equities(3, '.')
+    True
+    """
+    for count in range(players, 1, -1):
+        files = [os.path.join(directory, f'{count}_{street}.csv') for street in ('preflop', 'postflop')]
+        if all(os.path.exists(file) for file in files):
+            if count != players:
+                return get_equities(count, directory)
+            break
+    else:
+        raise FileNotFoundError(f'no equity tables for {players} players in {directory}')
+    equities = [0.0] * len(CARD_RANKS) ** len(CARD_RANKS)
+    for file in files:
+        header, table = output.open_file(file)
+        for key, row in table.items():
+            if output.split_suits(key)[1]:
+                raise ValueError(f'{file} is a suited table, the policies read plain tables')
+            equities[get_rank_key_value(key)] = (float(row[2].rstrip('%')) + float(row[3].rstrip('%')) / 2) / 100
+    return equities
+
+
+def call_policy(equity, to_call, pot, stack):
+    # a calling station, it never folds and never raises
+    return CALL
+
+
+def raise_policy(equity, to_call, pot, stack):
+    return BET
+
+
+def tight_policy(equity, to_call, pot, stack):
+    # all in with a strong hand, otherwise it only takes free cards
+    if equity >= 0.65:
+        return ALL_IN
+    return CALL if not to_call else FOLD
+
+
+def equity_policy(equity, to_call, pot, stack):
+    """
+    Bets with a clear edge and calls when the equity pays for the call.
+
+    >>> equity_policy(0.7, 2, 3, 100), equity_policy(0.45, 2, 3, 100), equity_policy(0.3, 4, 3, 100)
+    (2, 1, 0)
+    """
+    if equity >= 0.6:
+        return BET
+    return CALL if equity * (pot + to_call) >= to_call else FOLD
+
+
+POLICIES = {'call': call_policy, 'raise': raise_policy, 'tight': tight_policy, 'equity': equity_policy}
+
+
+def get_next_seat(stacks, seat):
+    # the next seat clockwise that still has chips
+    seat = (seat + 1) % len(stacks)
+    while not stacks[seat]:
+        seat = (seat + 1) % len(stacks)
+    return seat
+
+
+def play_street(first, policies, equities, stacks, contributions, bets, folded, big_blind):
+    # one betting round from seat first, bets holds what every player put in on this street
+    seats = len(stacks)
+    highest = max(bets)
+    raises = 0
+    pending = [not folded[seat] and stacks[seat] > 0 for seat in range(seats)]
+    live = seats - sum(folded)
+    seat = first
+    while live > 1 and any(pending):
+        if pending[seat]:
+            pending[seat] = False
+            to_call = highest - bets[seat]
+            pot = sum(contributions)
+            action = policies[seat](equities[seat], to_call, pot, stacks[seat])
+            if action == FOLD and to_call:
+                folded[seat] = True
+                live -= 1
+            else:
+                if action == ALL_IN:
+                    amount = stacks[seat]
+                elif action == BET and raises < MAX_RAISES:
+                    # a pot sized raise after calling
+                    amount = to_call + max(pot + to_call, big_blind)
+                else:
+                    amount = to_call
+                amount = min(amount, stacks[seat])
+                stacks[seat] -= amount
+                bets[seat] += amount
+                contributions[seat] += amount
+                if bets[seat] > highest:
+                    highest = bets[seat]
+                    raises += 1
+                    pending = [not folded[other] and stacks[other] > 0 and other != seat for other in range(seats)]
+        seat = (seat + 1) % seats
+
+
+def play_hand(policies, stacks, button, deal, small_blind, big_blind, directory='.'):
+    """
+    Blinds, a preflop and a flop betting round and the showdown of one hand, the stacks are updated in place.
+
+    The turn and the river are dealt without betting. Policies see the equity of their cards from the tables
+    of the players still in the hand, looked up by the rank count value of the cards.
+
+    >>> stacks = [100, 100]
+    >>> play_hand([call_policy, call_policy], stacks, 0, Dealer(seed=1).deal, 1, 2)
+    >>> stacks
+    [102, 98]
+    """
+    seats = len(stacks)
+    folded = [not stack for stack in stacks]
+    contributions = [0] * seats
+    cards = deal(5 + 2 * seats)
+    board = cards[:5]
+    hands = [cards[position:position + 2] for position in range(5, 5 + 2 * seats, 2)]
+    weights = strength.CARD_WEIGHTS
+    values = [weights[first.index] + weights[second.index] for first, second in hands]
+    # heads-up the button posts the small blind and acts first preflop
+    small = button if seats - sum(folded) == 2 else get_next_seat(stacks, button)
+    big = get_next_seat(stacks, small)
+    bets = [0] * seats
+    for seat, blind in ((small, small_blind), (big, big_blind)):
+        amount = min(blind, stacks[seat])
+        stacks[seat] -= amount
+        bets[seat] = contributions[seat] = amount
+    table = get_equities(seats - sum(folded), directory)
+    play_street((big + 1) % seats, policies, [table[value] for value in values], stacks, contributions, bets,
+                folded, big_blind)
+    if sum(1 for seat in range(seats) if not folded[seat] and stacks[seat]) > 1:
+        table = get_equities(seats - sum(folded), directory)
+        flop = weights[board[0].index] + weights[board[1].index] + weights[board[2].index]
+        play_street((button + 1) % seats, policies, [table[value + flop] for value in values], stacks,
+                    contributions, [0] * seats, folded, big_blind)
+    live = [seat for seat in range(seats) if not folded[seat]]
+    if len(live) == 1:
+        stacks[live[0]] += sum(contributions)
+        return
+    payouts = settle(hands, board, contributions, [seat for seat in range(seats) if folded[seat]])
+    for seat, payout in enumerate(payouts):
+        stacks[seat] += payout
+
+
+def play_match(policies, deal, directory='.'):
+    """
+    Hands until one player has all the chips, returns the final stacks and the number of hands.
+
+    >>> stacks, hands = play_match([raise_policy, tight_policy, call_policy], Dealer(seed=5).deal)
+    >>> sum(stacks), sorted(stacks)[:2], hands > 0
+    (300, [0, 0], True)
+    """
+    stacks = [STACK] * len(policies)
+    button = len(policies) - 1
+    hands = 0
+    while hands < MATCH_HANDS and sum(1 for stack in stacks if stack) > 1:
+        level = 2 ** (hands // BLIND_HANDS)
+        button = get_next_seat(stacks, button)
+        play_hand(policies, stacks, button, deal, SMALL_BLIND * level, BIG_BLIND * level, directory)
+        hands += 1
+    return stacks, hands
+
+
+def play_tournament_shard(shard):
+    names, seed, index, matches, directory = shard
+    deal = Dealer(rng=get_shard_rng(seed, index)).deal
+    played = dict.fromkeys(names, 0)
+    won = dict.fromkeys(names, 0.0)
+    hands = 0
+    for match in range(matches):
+        # the seats rotate from match to match, so no policy keeps the better position
+        shift = (index * SHARD_MATCHES + match) % len(names)
+        seated = names[shift:] + names[:shift]
+        stacks, match_hands = play_match([POLICIES[name] for name in seated], deal, directory)
+        hands += match_hands
+        best = max(stacks)
+        winners = [name for name, stack in zip(seated, stacks) if stack == best]
+        for name in seated:
+            played[name] += 1
+        for name in winners:
+            won[name] += 1 / len(winners)
+    return index, matches, hands, played, won
+
+
+def tournament(names, matches, workers=1, seed=None, directory='.'):
+    """
+    Play matches between the policies of names, one seat each, split into shards over worker processes.
+
+    Returns the played and won matches of every policy and the number of hands. A policy can take several seats,
+    a match won by equal stacks counts as a share of a win for each of them.
+
+    >>> tournament(['equity', 'call'], 20, seed=1) == tournament(['equity', 'call'], 20, workers=2, seed=1)
+    True
+    >>> tournament(['call'] * 8, 2)
+    Traceback (most recent call last):
+    ...
+    ValueError: a match needs 2 to 7 seats, not 8
+    """
+    if not 2 <= len(names) <= MAX_SEATS:
+        raise ValueError(f'a match needs 2 to {MAX_SEATS} seats, not {len(names)}')
+    shards = [(list(names), seed, index, min(SHARD_MATCHES, matches - start), directory)
+              for index, start in enumerate(range(0, matches, SHARD_MATCHES))]
+    played = dict.fromkeys(names, 0)
+    won = dict.fromkeys(names, 0.0)
+    hands = 0
+    pool = multiprocessing.Pool(workers) if workers > 1 else None
+    try:
+        results = pool.imap_unordered(play_tournament_shard, shards) if pool else map(play_tournament_shard, shards)
+        for index, shard_matches, shard_hands, shard_played, shard_won in results:
+            hands += shard_hands
+            for name in shard_played:
+                played[name] += shard_played[name]
+                won[name] += shard_won[name]
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    return played, won, hands
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Self-play matches between betting policies.')
+    parser.add_argument('policies', nargs='+', choices=list(POLICIES), help='the policy of every seat')
+    parser.add_argument('--matches', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--directory', default='.', help='where the equity tables are')
+    arguments = parser.parse_args()
+    if not 2 <= len(arguments.policies) <= MAX_SEATS:
+        parser.error(f'a match needs 2 to {MAX_SEATS} seats')
+    started = time.perf_counter()
+    played, won, hands = tournament(arguments.policies, arguments.matches, arguments.workers, arguments.seed,
+                                    arguments.directory)
+    elapsed = time.perf_counter() - started
+    for name in played:
+        width = get_interval_width(won[name], played[name])
+        print(f'{name}: {won[name] / played[name] * 100:.1f}% ± {width * 50:.1f}% of {played[name]} seats')
+    print(f'{hands} hands in {elapsed:.1f}s ({hands / elapsed * 3600:,.0f} hands per hour)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+import numpy as np
+
+import poker
+import strength
+from card import CARD_RANKS, DECK
+
+BATCH_ROUNDS = 100_000
+CARD_MASKS = np.array([card.mask for card in DECK], dtype=np.int64)
+CARD_CODES = np.array([len(CARD_RANKS) ** card.rank_index for card in DECK], dtype=np.int64)
+
+_mask_strengths = None
+
+
+def get_mask_strengths():
+    # strength of every 7-card hand indexed directly by its 20-bit mask
+    global _mask_strengths
+    if _mask_strengths is None:
+        mask_strengths = np.zeros(1 << len(DECK), dtype=np.uint16)
+        for mask, value in strength.get_mask_table().items():
+            mask_strengths[mask] = value
+        _mask_strengths = mask_strengths
+    return _mask_strengths
+
+
+def get_bucket_lookup(keys):
+    """
+    Maps the rank counts of a hand, written as a base 5 number, to the position of its key.
+
+    >>> lookup = get_bucket_lookup(['AA', 'AK'])
+    >>> int(lookup[2]), int(lookup[1 + 5]), int(lookup[2 * 5])
+    (0, 1, -1)
+    """
+    lookup = np.full(len(CARD_RANKS) ** len(CARD_RANKS), -1, dtype=np.int64)
+    for position, key in enumerate(keys):
+        lookup[sum(key.count(rank) * len(CARD_RANKS) ** index for index, rank in enumerate(CARD_RANKS))] = position
+    return lookup
+
+
+def deal(rounds, cards, rng):
+    # sorting random keys gives every row its own uniform permutation of the deck
+    return rng.random((rounds, len(DECK))).argsort(axis=1)[:, :cards]
+
+
+def play_batch(rounds, players, cards, lookup, rng):
+    """
+    Deal rounds at once and count them per bucket of the hero's cards.
+
+    cards picks the columns of a deal that make up the bucket, the board is in
+    columns 0 to 4 and player p holds columns 5 + 2p and 6 + 2p.
+
+    >>> lookup = get_bucket_lookup(list(poker.initialize_table()))
+    >>> played, won, even, lost = play_batch(1000, 3, [5, 6], lookup, np.random.default_rng(1))
+    >>> int(played.sum()), bool((played == won + even + lost).all())
+    (1000, True)
+    """
+    deals = deal(rounds, 5 + 2 * players, rng)
+    masks = CARD_MASKS[deals]
+    board_mask = masks[:, 0] + masks[:, 1] + masks[:, 2] + masks[:, 3] + masks[:, 4]
+    mask_strengths = get_mask_strengths()
+    hero = mask_strengths[board_mask + masks[:, 5] + masks[:, 6]]
+    opponents = np.zeros(rounds, dtype=hero.dtype)
+    for player in range(1, players):
+        np.maximum(opponents, mask_strengths[board_mask + masks[:, 5 + 2 * player] + masks[:, 6 + 2 * player]],
+                   out=opponents)
+    # adding 5 ** rank per card gives the rank counts as digits of a base 5 number
+    codes = CARD_CODES[deals[:, cards[0]]]
+    for column in cards[1:]:
+        codes += CARD_CODES[deals[:, column]]
+    buckets = lookup[codes]
+    size = lookup.max() + 1
+    return (np.bincount(buckets, minlength=size),
+            np.bincount(buckets[hero > opponents], minlength=size),
+            np.bincount(buckets[hero == opponents], minlength=size),
+            np.bincount(buckets[hero < opponents], minlength=size))
+
+
+def simulate(rounds, players, keys, cards, batch=BATCH_ROUNDS, seed=None):
+    """
+    Play rounds in batches and count them per key, like poker.simulate, keys has to cover every bucket.
+
+    >>> played, won, even, lost = simulate(200_000, 3, list(poker.initialize_table()), [5, 6], seed=1)
+    50%
+    100%
+    >>> sum(played.values()), won['AA'] / played['AA'] > won['TT'] / played['TT']
+    (200000, True)
+    >>> keys = list(poker.initialize_table())
+    >>> simulate(1000, 3, keys, [5, 6], seed=2) == simulate(1000, 3, keys, [5, 6], seed=2)
+    100%
+    100%
+    True
+    """
+    rng = np.random.default_rng(seed)
+    lookup = get_bucket_lookup(keys)
+    totals = [np.zeros(len(keys), dtype=np.int64) for _ in range(4)]
+    done = 0
+    while done < rounds:
+        size = min(batch, rounds - done)
+        for total, amount in zip(totals, play_batch(size, players, cards, lookup, rng)):
+            total += amount
+        done += size
+        print(f'{done / rounds * 100:.0f}%')
+    return [dict(zip(keys, total.tolist())) for total in totals]
+
+
+def preflop(rounds, players, file, batch=BATCH_ROUNDS, seed=None):
+    keys = list(poker.initialize_table())
+    played_amount, won_amount, even_amount, lost_amount = simulate(rounds, players, keys, [5, 6], batch, seed)
+    poker.write_table(file, played_amount, won_amount, even_amount, lost_amount)
+
+
+def postflop(rounds, players, file, batch=BATCH_ROUNDS, seed=None):
+    keys = list(poker.initialize_postflop_table())
+    played_amount, won_amount, even_amount, lost_amount = simulate(rounds, players, keys, [5, 6, 0, 1, 2], batch,
+                                                                   seed)
+    poker.write_table(file, played_amount, won_amount, even_amount, lost_amount)
+
+
+if __name__ == '__main__':
+    postflop(10_000_000, 3, '3_postflop.csv')